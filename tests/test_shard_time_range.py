@@ -0,0 +1,47 @@
+import math
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from youtube_frames_to_png import shard_time_range  # noqa: E402
+
+
+def single_run(start_s, end_s, fps, every_n):
+    """Frames que guarda un solo ffmpeg: número de salida -> índice del frame de origen."""
+    frames = [k for k in range(math.ceil(end_s * fps) + 1) if start_s <= k / fps < end_s]
+    return {i + 1: k for i, k in enumerate(frames[::every_n])}
+
+
+def sharded_run(start_s, end_s, fps, every_n, workers):
+    """Lo mismo repartido en tramos: cada uno aplica `select` y numera desde su start_number."""
+    out = {}
+    for ss, to, start_number in shard_time_range(start_s, end_s, fps, every_n, workers):
+        frames = [k for k in range(math.ceil(to * fps) + 1) if ss <= k / fps < to]
+        for i, k in enumerate(frames[::every_n]):
+            assert start_number + i not in out
+            out[start_number + i] = k
+    return out
+
+
+class ShardTimeRangeTest(unittest.TestCase):
+    def assert_same_frames(self, start_s, end_s, fps, every_n, workers=4):
+        self.assertEqual(sharded_run(start_s, end_s, fps, every_n, workers),
+                         single_run(start_s, end_s, fps, every_n))
+
+    def test_ntsc_rate_with_start_off_grid(self):
+        # 29.97 fps: a los 60 s el primer frame cae a más de medio frame del inicio
+        for every_n in (1, 4):
+            self.assert_same_frames(60.0, 80.0, 30000 / 1001, every_n)
+
+    def test_start_between_frames(self):
+        for every_n in (1, 3):
+            self.assert_same_frames(1.01, 13.37, 30.0, every_n)
+
+    def test_frame_exactly_at_end_is_excluded(self):
+        self.assert_same_frames(2.5, 27.3, 30.0, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
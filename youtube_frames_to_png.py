@@ -1,12 +1,25 @@
 #!/usr/bin/env python3
 import os
+import queue
+import selectors
 import sys
 import json
+import functools
+import hashlib
+import io
+import math
+import multiprocessing
 import shutil
 import subprocess
 import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from multiprocessing import shared_memory
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 # ---- Dependencias de Python -------------------------------------------------
 try:
@@ -21,8 +34,34 @@ except ImportError:
     print("Falta 'tqdm'. Instala con: pip install tqdm", file=sys.stderr)
     sys.exit(1)
 
+# Opcional: con Pillow los PNG se codifican en Python, en paralelo (ver _extract_rawpipe)
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Opcional: fpng codifica PNG con SIMD, mucho más rápido que zlib (ver _encode_frame)
+try:
+    import fpng_py
+except ImportError:
+    fpng_py = None
+
+# Opcional: con PyAV la decodificación ocurre dentro del proceso, sin ffmpeg hijo ni pipe
+try:
+    import av
+    import numpy as np
+except ImportError:
+    av = None
+
 
 # ---- Utilidades --------------------------------------------------------------
+# Intervalo mínimo (s) entre actualizaciones de las barras de progreso
+PROGRESS_INTERVAL = 0.25
+# tqdm también limita su redibujado; así no formatea la barra en cada update()
+PBAR_OPTS = dict(mininterval=PROGRESS_INTERVAL, maxinterval=1.0)
+BYTES_PER_MB = 1_000_000
+
+
 def ask(prompt: str, default: Optional[str] = None) -> str:
     s = input(f"{prompt}" + (f" [{default}]" if default else "") + ": ").strip()
     return s or (default or "")
@@ -43,48 +82,128 @@ def find_ffmpeg_tools() -> Tuple[str, str, Optional[str]]:
     return ffmpeg, ffprobe, ff_dir
 
 
+# Aceleradores de decodificación por hardware que se comprueban al inicio
+HWACCEL_PREFERENCE = ("cuda", "videotoolbox", "qsv", "vaapi")
+
+
+def detect_hwaccel() -> Optional[str]:
+    """Devuelve "auto" si hay un dispositivo de decodificación por hardware usable, o None.
+
+    `ffmpeg -hwaccels` lista los métodos compilados, no los dispositivos presentes (las
+    builds de distribuciones incluyen cuda/qsv/vaapi aunque no haya GPU), y un
+    `-hwaccel cuda` sin dispositivo es un error fatal. Por eso se intenta crear cada
+    dispositivo listado; si alguno funciona se usa `-hwaccel auto`, que además vuelve
+    a decodificar por CPU si el códec concreto no está soportado.
+    """
+    try:
+        out = subprocess.check_output(["ffmpeg", "-hide_banner", "-hwaccels"],
+                                      stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    # La primera línea es el encabezado "Hardware acceleration methods:"; la salida es ASCII
+    listed = {line.strip() for line in out.splitlines()[1:] if line.strip()}
+    for name in HWACCEL_PREFERENCE:
+        if name.encode() not in listed:
+            continue
+        probe = ["ffmpeg", "-hide_banner", "-loglevel", "quiet", "-init_hw_device", name,
+                 "-f", "lavfi", "-i", "nullsrc=s=16x16", "-frames:v", "1", "-f", "null", "-"]
+        if subprocess.run(probe, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL).returncode == 0:
+            return "auto"
+    return None
+
+
+@functools.lru_cache(maxsize=32)
 def to_sec(ts: str) -> float:
-    """Convierte HH:MM:SS(.ms) a segundos (float)."""
+    """Convierte HH:MM:SS(.ms) a segundos (float). También acepta MM:SS y SS."""
     if not ts:
         return 0.0
-    parts = ts.split(":")
-    parts = [float(p) for p in parts]
-    while len(parts) < 3:
-        parts.insert(0, 0.0)
-    return parts[0] * 3600 + parts[1] * 60 + parts[2]
+    # Rellenamos por la izquierda en vez de insertar en la lista parte por parte
+    h, m, s = (["0", "0"] + ts.split(":"))[-3:]
+    return float(h) * 3600 + float(m) * 60 + float(s)
+
+
+def scaled_size(width: int, height: int, scale: Tuple[int, int]) -> Tuple[int, int]:
+    """Resuelve el tamaño de salida; un lado -1 conserva la proporción (redondeado a par).
+
+    Si la resolución de origen es desconocida, el lado libre queda en -2 y lo calcula ffmpeg.
+    """
+    w, h = scale
+    if w > 0 and h > 0:
+        return w, h
+    if width <= 0 or height <= 0:
+        return (w if w > 0 else -2), (h if h > 0 else -2)
+    if w > 0:
+        return w, max(2, round(height * w / width / 2) * 2)
+    return max(2, round(width * h / height / 2) * 2), h
+
+
+def parse_size(text: str) -> Optional[Tuple[int, int]]:
+    """Interpreta "ANCHOxALTO" (p.ej. "640x360" o "640x-1"); None si está vacío o es inválido."""
+    try:
+        w, h = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        return None
+    if w == 0 or h == 0 or w < -1 or h < -1 or (w < 0 and h < 0):
+        return None
+    return w, h
 
 
 # ---- Descarga con yt-dlp -----------------------------------------------------
-def download_youtube(url: str, tmpdir: Path, ff_dir: Optional[str]) -> Path:
-    """Descarga el video con progreso y devuelve la ruta del MP4 resultante."""
+def download_youtube(url: str, tmpdir: Path, ff_dir: Optional[str],
+                     on_file: Optional[Callable[[Path], None]] = None) -> Path:
+    """Descarga el video con progreso y devuelve la ruta del MP4 resultante.
+
+    `on_file`, si se indica, recibe la ruta del archivo en cuanto empiezan a llegar
+    bytes, para poder leerlo mientras aún se está descargando.
+    """
     outtmpl = str(tmpdir / "%(title).200B.%(ext)s")
 
     pbar = None
+    last_render = 0.0
 
     def hook(d):
-        nonlocal pbar
+        nonlocal pbar, last_render, on_file
         if d["status"] == "downloading":
+            if on_file is not None:
+                on_file(Path(d["filename"]))
+                on_file = None
+            # yt-dlp llama al hook por cada bloque recibido: solo refrescamos cada ~250 ms
+            now = time.monotonic()
+            if pbar is not None and now - last_render < PROGRESS_INTERVAL:
+                return
+            last_render = now
             total = d.get("total_bytes") or d.get("total_bytes_estimate")
             downloaded = d.get("downloaded_bytes", 0)
+            # Escalamos a MB nosotros: evita el formateo SI (unit_scale) de tqdm en cada update
+            total_mb = round(total / BYTES_PER_MB, 1) if total else None
             if pbar is None:
                 # Si conocemos el total, barra normal; si no, barra indeterminada (total=None)
-                pbar = tqdm(total=total if total else None, unit="B", unit_scale=True,
-                            desc="Descargando", leave=False)
-            if total and pbar.total != total:
-                pbar.total = total
+                pbar = tqdm(total=total_mb, unit="MB", desc="Descargando", leave=False, **PBAR_OPTS)
+            if total_mb and pbar.total != total_mb:
+                pbar.total = total_mb
             if downloaded is not None:
                 # Actualizamos en base a diferencia
-                inc = downloaded - (pbar.n or 0)
+                inc = round(downloaded / BYTES_PER_MB, 1) - (pbar.n or 0)
                 if inc > 0:
                     pbar.update(inc)
         elif d["status"] == "finished":
             if pbar:
                 pbar.close()
+                # Si hubiera otra descarga después, tendrá su propia barra
+                pbar = None
 
     ydl_opts = {
         "outtmpl": outtmpl,
-        "format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
-        "merge_output_format": "mp4",
+        # Solo video: el audio no se usa para extraer frames, así evitamos descargarlo
+        # y la fusión posterior con ffmpeg
+        "format": "bestvideo[ext=mp4]/best[ext=mp4]/best",
+        # Sin correcciones automáticas (remux con ffmpeg): reemplazarían el archivo que
+        # se está leyendo mientras se descarga
+        "fixup": "never",
+        # Sin .part: se escribe directo al nombre final y no hay rename al terminar
+        # (en Windows fallaría si otro proceso tiene el archivo abierto)
+        "nopart": True,
         "noplaylist": True,
         "quiet": True,
         "no_warnings": True,
@@ -95,49 +214,252 @@ def download_youtube(url: str, tmpdir: Path, ff_dir: Optional[str]) -> Path:
         ydl_opts["ffmpeg_location"] = ff_dir
 
     with YoutubeDL(ydl_opts) as ydl:
-        ydl.extract_info(url, download=True)
+        info = ydl.extract_info(url, download=True)
+        # Ruta final según yt-dlp; sin fusión ni remux coincide con prepare_filename
+        downloads = info.get("requested_downloads") or [{}]
+        filepath = Path(downloads[0].get("filepath") or ydl.prepare_filename(info))
 
-    mp4s = sorted(tmpdir.glob("*.mp4"), key=lambda p: p.stat().st_mtime, reverse=True)
-    if not mp4s:
+    if not filepath.is_file():
         raise FileNotFoundError(
             "No se encontró el MP4 descargado. Verifica que FFmpeg (ffmpeg y ffprobe) esté instalado y accesible."
         )
-    return mp4s[0]
+    return filepath
+
+
+# ---- Descarga en streaming (yt-dlp → ffmpeg por pipe) ------------------------
+def stream_youtube(url: str, tmpdir: Path,
+                   ff_dir: Optional[str]) -> Tuple[subprocess.Popen, Dict[str, Any]]:
+    """Lanza yt-dlp escribiendo el video a stdout y devuelve (proceso, info).
+
+    `info` tiene las mismas claves que `probe_video_info`, tomadas de los metadatos de yt-dlp.
+
+    Se pide un único archivo progresivo (sin fusión de audio+video) para que ffmpeg
+    pueda decodificar a medida que llegan los bytes, solapando red y CPU.
+    """
+    fmt = "best[ext=mp4]/best"
+    ydl_opts = {
+        "format": fmt,
+        "noplaylist": True,
+        "quiet": True,
+        "no_warnings": True,
+    }
+    if ff_dir:
+        ydl_opts["ffmpeg_location"] = ff_dir
+
+    # Extraemos la info una sola vez y se la pasamos al proceso hijo con
+    # --load-info-json, así no repite la consulta a YouTube.
+    with YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+        info_json = tmpdir / "info.json"
+        info_json.write_text(json.dumps(ydl.sanitize_info(info)), encoding="utf-8")
+
+    cmd = [
+        sys.executable, "-m", "yt_dlp",
+        "--load-info-json", str(info_json),
+        "-f", fmt,
+        "-o", "-",
+        "--quiet", "--no-warnings",
+    ]
+    if ff_dir:
+        cmd += ["--ffmpeg-location", ff_dir]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+
+    video_info = {
+        "duration": float(info.get("duration") or 0.0),
+        "fps": float(info.get("fps") or 0.0),
+        "width": int(info.get("width") or 0),
+        "height": int(info.get("height") or 0),
+        "nb_frames": 0,
+    }
+    return proc, video_info
 
 
 # ---- Probe de video con ffprobe ----------------------------------------------
-def probe_video_info(video_path: Path) -> Tuple[float, float]:
-    """Devuelve (duración_seg, fps) usando ffprobe."""
+def probe_video_info(video_path: Path) -> Dict[str, Any]:
+    """Devuelve {duration, fps, width, height, nb_frames} con una sola llamada a ffprobe."""
+    # Copia: el dict cacheado no debe modificarse desde fuera
+    return dict(_probe_video_info(str(video_path)))
+
+
+@functools.lru_cache(maxsize=8)
+def _probe_video_info(video_path: str) -> Dict[str, Any]:
     cmd = [
         "ffprobe",
         "-v", "error",
         "-select_streams", "v:0",
-        "-show_entries", "stream=r_frame_rate",
-        "-show_entries", "format=duration",
+        "-show_entries", "stream=r_frame_rate,width,height,nb_frames,duration:format=duration",
         "-of", "json",
-        str(video_path),
+        video_path,
     ]
-    out = subprocess.check_output(cmd, text=True)
+    # Bytes sin decodificar: json.loads detecta el UTF-8 de ffprobe (con `text=True` se
+    # usaría la codificación local, que en Windows corrompe nombres con tildes)
+    out = subprocess.check_output(cmd)
     data = json.loads(out)
-    duration = float(data.get("format", {}).get("duration", 0.0))
-    fps_str = data.get("streams", [{}])[0].get("r_frame_rate", "0/0")
+    stream = (data.get("streams") or [{}])[0]
+    # La duración del contenedor es la más fiable; si falta, usamos la del stream
+    duration = data.get("format", {}).get("duration") or stream.get("duration") or 0.0
+    fps_str = stream.get("r_frame_rate", "0/0")
     try:
         num, den = fps_str.split("/")
         fps = float(num) / float(den) if float(den) != 0 else 0.0
     except Exception:
         fps = 0.0
-    return duration, fps
+    try:
+        nb_frames = int(stream.get("nb_frames", 0))
+    except ValueError:
+        # Algunos contenedores devuelven "N/A"
+        nb_frames = 0
+    return {
+        "duration": float(duration),
+        "fps": fps,
+        "width": int(stream.get("width", 0)),
+        "height": int(stream.get("height", 0)),
+        "nb_frames": nb_frames,
+    }
+
+
+# ---- Lectura de -progress de ffmpeg ------------------------------------------
+# Buffer del pipe de progreso y tamaño de cada lectura
+PROGRESS_BUFSIZE = 1 << 20
+PROGRESS_CHUNK = 1 << 16
+
+
+def _last_progress_frame(buf: bytes) -> Tuple[bytes, Optional[int]]:
+    """Devuelve (resto sin salto de línea, último `frame=` de las líneas completas o None).
+
+    ffmpeg emite pares key=value (frame=, out_time_ms=, speed=, progress=...); solo
+    interesa `frame=`, así que el resto se descarta comparando el prefijo en bytes,
+    sin decodificar ni partir cada línea.
+    """
+    lines = buf.split(b"\n")
+    tail = lines.pop()
+    value = None
+    for line in lines:
+        if line.startswith(b"frame="):
+            value = line[6:]
+    if value is not None:
+        try:
+            return tail, int(value)
+        except ValueError:
+            pass
+    return tail, None
+
+
+def _iter_progress_frames(stream: IO[bytes]) -> Iterator[int]:
+    """Lee la salida de `-progress` en bloques y produce el último `frame=` de cada bloque."""
+    tail = b""
+    while True:
+        chunk = stream.read1(PROGRESS_CHUNK)
+        if not chunk:
+            break
+        tail, cur = _last_progress_frame(tail + chunk)
+        if cur is not None:
+            yield cur
+
+
+def _read_progress_many(streams: List[IO[bytes]]) -> Iterator[Tuple[int, Optional[int]]]:
+    """Lee el `-progress` de varios ffmpeg a la vez y produce (índice, frame).
+
+    Al cerrarse cada pipe produce (índice, None). En POSIX un único hilo espera sobre
+    todos los pipes con `selectors` (epoll/kqueue) y atiende en cada vuelta todos los
+    que estén listos. En Windows `select` no admite pipes: un hilo lector por pipe.
+    """
+    if os.name != "posix":
+        events: "queue.Queue[Tuple[int, Optional[int]]]" = queue.Queue()
+
+        def pump(i: int, stream: IO[bytes]) -> None:
+            for cur in _iter_progress_frames(stream):
+                events.put((i, cur))
+            events.put((i, None))
+
+        for i, stream in enumerate(streams):
+            threading.Thread(target=pump, args=(i, stream), daemon=True).start()
+        pending = len(streams)
+        while pending:
+            i, cur = events.get()
+            if cur is None:
+                pending -= 1
+            yield i, cur
+        return
+
+    sel = selectors.DefaultSelector()
+    tails = {}
+    for i, stream in enumerate(streams):
+        sel.register(stream.fileno(), selectors.EVENT_READ, i)
+        tails[i] = b""
+    try:
+        while tails:
+            for key, _ in sel.select():
+                i = key.data
+                chunk = os.read(key.fd, PROGRESS_CHUNK)
+                if not chunk:
+                    sel.unregister(key.fd)
+                    del tails[i]
+                    yield i, None
+                    continue
+                tails[i], cur = _last_progress_frame(tails[i] + chunk)
+                if cur is not None:
+                    yield i, cur
+    finally:
+        sel.close()
 
 
 # ---- Extracción de frames con progreso ---------------------------------------
-def ffmpeg_extract_frames(video_path: Path, output_dir: Path, every_n: int = 1,
-                          start_ts: Optional[str] = None, end_ts: Optional[str] = None) -> None:
-    """Extrae frames a PNG con barra de progreso estimada o indeterminada."""
+def estimate_frames(video_info: Dict[str, Any], every_n: int = 1, start_ts: Optional[str] = None,
+                    end_ts: Optional[str] = None, target_fps: Optional[str] = None) -> int:
+    """Número aproximado de imágenes a extraer (0 si no se puede estimar)."""
+    dur, fps = video_info["duration"], video_info["fps"]
+    start_s = to_sec(start_ts) if start_ts else 0.0
+    if end_ts:
+        effective_duration = max(0.0, to_sec(end_ts) - start_s)
+    else:
+        effective_duration = max(0.0, dur - start_s) if dur > 0 else 0.0
+    if target_fps:
+        return int(effective_duration * float(Fraction(target_fps)))
+    if not start_ts and not end_ts and video_info["nb_frames"] > 0:
+        # Video completo: el conteo del contenedor es exacto
+        return math.ceil(video_info["nb_frames"] / max(1, every_n))
+    if fps > 0 and effective_duration > 0:
+        return int((effective_duration * fps) / max(1, every_n))
+    return 0
+
+
+class EncoderPoolError(Exception):
+    """Algún proceso de codificación de imágenes terminó con error."""
+
+
+# Fallos de extracción que se informan con un mensaje en lugar de una traza: ffmpeg con
+# código de error, el pool de codificadores caído o PyAV sin poder decodificar la entrada
+EXTRACT_ERRORS: Tuple[type, ...] = (subprocess.CalledProcessError, EncoderPoolError)
+if av is not None:
+    EXTRACT_ERRORS += (av.error.FFmpegError,)
+
+
+def ffmpeg_extract_frames(video_path: Optional[Path], output_dir: Path, every_n: int = 1,
+                          start_ts: Optional[str] = None, end_ts: Optional[str] = None,
+                          stdin: Optional[IO[bytes]] = None,
+                          video_info: Optional[Dict[str, Any]] = None,
+                          image_format: str = "png", hwaccel: Optional[str] = None,
+                          target_fps: Optional[str] = None, dedup: Optional[str] = None,
+                          gray: bool = False, scale: Optional[Tuple[int, int]] = None) -> None:
+    """Extrae frames a PNG (o JPG) con barra de progreso estimada o indeterminada.
+
+    Si se pasa `stdin`, ffmpeg lee el video desde ese pipe (`-i pipe:0`) y se ignora
+    `video_path`; en ese caso `video_info` (mismo formato que `probe_video_info`) evita sondear.
+    `hwaccel` (p.ej. "auto") delega la decodificación a la GPU. `target_fps` (p.ej. "1"
+    o "1/5") fija la tasa de salida con el filtro `fps` y reemplaza a `every_n`.
+    `dedup` ("exact" o "similar") omite frames repetidos; requiere Pillow.
+    `gray` guarda imágenes de 8 bits en escala de grises (1/3 de los bytes de RGB) y
+    `scale` (ancho, alto; -1 conserva la proporción) reduce la resolución de salida.
+    """
     output_dir.mkdir(parents=True, exist_ok=True)
-    out_pattern = str(output_dir / "frame_%06d.png")
+    out_pattern = str(output_dir / f"frame_%06d.{image_format}")
 
     # Estimación (si es posible)
-    dur, fps = probe_video_info(video_path)
+    if video_info is None:
+        video_info = probe_video_info(video_path)
+    dur, fps = video_info["duration"], video_info["fps"]
+    width, height = video_info["width"], video_info["height"]
     start_s = to_sec(start_ts) if start_ts else 0.0
     if end_ts:
         end_s = to_sec(end_ts)
@@ -145,65 +467,115 @@ def ffmpeg_extract_frames(video_path: Path, output_dir: Path, every_n: int = 1,
         end_s = dur if dur > 0 else 0.0
 
     effective_duration = max(0.0, (end_s - start_s) if end_ts else (dur - start_s if dur > 0 else 0.0))
-    est_frames = int((effective_duration * fps) / max(1, every_n)) if fps > 0 and effective_duration > 0 else 0
+    est_frames = estimate_frames(video_info, every_n, start_ts, end_ts, target_fps)
 
-    # Filtro para extraer 1 de cada N
+    # Filtro para extraer 1 de cada N, o a una tasa fija
     vf = []
-    if every_n > 1:
+    if target_fps:
+        vf.append(f"fps={target_fps}")
+    elif every_n > 1:
         vf.append(f"select='not(mod(n\\,{every_n}))',setpts=N/FRAME_RATE/TB")
+    selecting = bool(vf)
+    # Escalar y convertir después de seleccionar: solo se procesan los frames que se guardan
+    if scale:
+        width, height = scaled_size(width, height, scale)
+        vf.append(f"scale={width}:{height}:flags=fast_bilinear")
+    if gray:
+        vf.append("format=gray")
+    channels = 1 if gray else 3
+
+    head = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    if hwaccel:
+        head += ["-hwaccel", hwaccel]
+    src = "pipe:0" if stdin is not None else str(video_path)
+
+    sel_opts = []
+    if vf:
+        sel_opts += ["-vf", ",".join(vf)]
+    # `vfr` solo si se descartan frames; si no, cada frame decodificado se guarda tal cual
+    sel_opts += ["-vsync", "vfr" if selecting else "0"]
+
+    if dedup and (Image is None or width <= 0 or height <= 0):
+        # Sin Pillow o sin resolución (p.ej. metadatos incompletos de yt-dlp) no hay frames crudos
+        print("No se puede omitir frames repetidos (falta Pillow o no se conoce la resolución). "
+              "Se guardarán todos.", file=sys.stderr)
+        dedup = None
 
-    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-progress", "pipe:1"]
+    # Desde un pipe no se puede repartir por tramos: si hay Pillow, ffmpeg (o PyAV)
+    # solo decodifica y la codificación de imágenes se reparte entre varios procesos.
+    # Omitir duplicados también exige ver cada frame en Python antes de codificarlo.
+    if (stdin is not None or dedup) and Image is not None and width > 0 and height > 0:
+        # Con `fps` o `scale` no: el redondeo de `fps` (el último frame de cada intervalo)
+        # y el escalado (en YUV, antes de pasar a RGB) los aplica ffmpeg, así la misma
+        # configuración da las mismas imágenes en cualquier camino.
+        if stdin is not None and av is not None and not target_fps and not scale:
+            _extract_pyav(stdin, output_dir, image_format, width, height, est_frames,
+                          start_s, to_sec(end_ts) if end_ts else None, every_n, dedup, channels)
+            return
+        cmd = list(head)
+        if start_ts:
+            cmd += ["-ss", start_ts]
+        if end_ts:
+            cmd += ["-to", end_ts]
+        cmd += ["-i", src] + sel_opts
+        _extract_rawpipe(cmd, stdin, output_dir, image_format, width, height, est_frames, dedup,
+                         channels)
+        return
+
+    head += ["-progress", "pipe:1"]
+    out_opts = list(sel_opts)
+    if image_format == "jpg":
+        # JPEG casi sin pérdida visible; mucho más rápido de codificar que el deflate de PNG
+        out_opts += ["-q:v", "2"]
+    else:
+        # zlib nivel 1: varias veces más rápido que el nivel por defecto, ~10% más de disco
+        out_opts += ["-compression_level", "1"]
+
+    # Con un archivo (no pipe) podemos repartir el rango entre varios ffmpeg en paralelo.
+    # Con `fps` no: a tasas bajas casi todo es decodificación, que ya usa varios hilos.
+    workers = 1
+    if stdin is None and not target_fps and fps > 0 and est_frames > 0:
+        workers = max(1, min(os.cpu_count() or 1, int(effective_duration // MIN_SHARD_SECONDS)))
+    if workers > 1:
+        shards = shard_time_range(start_s, start_s + effective_duration, fps, every_n, workers)
+        _extract_sharded(head, src, out_opts, out_pattern, shards, est_frames)
+        return
+
+    cmd = list(head)
     if start_ts:
         cmd += ["-ss", start_ts]
-    cmd += ["-i", str(video_path)]
     if end_ts:
+        # Como opción de entrada, -to es absoluto respecto al video (igual que -ss)
         cmd += ["-to", end_ts]
-    if vf:
-        cmd += ["-vf", ",".join(vf), "-vsync", "vfr"]
-    else:
-        cmd += ["-vsync", "0"]
+    cmd += ["-i", src]
+    # Un único proceso: que libavcodec use todos los núcleos
+    cmd += ["-threads", "0"] + out_opts
     cmd += ["-start_number", "1", out_pattern]
 
     # Barra de progreso
     if est_frames > 0:
-        pbar = tqdm(total=est_frames, unit="frame", desc="Extrayendo")
+        pbar = tqdm(total=est_frames, unit="frame", desc="Extrayendo", **PBAR_OPTS)
     else:
         # Desconocido: barra indeterminada + conteo de frames
-        pbar = tqdm(total=None, unit="frame", desc="Extrayendo")
+        pbar = tqdm(total=None, unit="frame", desc="Extrayendo", **PBAR_OPTS)
 
-    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+    # Pipe en binario con buffer grande: leemos bloques, no líneas (ver _iter_progress_frames)
+    proc = subprocess.Popen(cmd, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            bufsize=PROGRESS_BUFSIZE)
     last_frames_counted = 0
-    last_out_time = 0.0
+    last_render = 0.0
 
     try:
-        for line in proc.stdout:
-            line = line.strip()
-            # ffmpeg -progress emite pares key=value, p.ej.:
-            # frame=123
-            # out_time_ms=1234567
-            # progress=continue|end
-            if line.startswith("frame="):
-                try:
-                    cur = int(line.split("=", 1)[1])
-                    if est_frames == 0:
-                        # Barra indeterminada: actualizamos por diferencia
-                        inc = cur - last_frames_counted
-                        if inc > 0:
-                            pbar.update(inc)
-                            last_frames_counted = cur
-                except:
-                    pass
-            elif line.startswith("out_time_ms=") and est_frames > 0:
-                try:
-                    ms = int(line.split("=", 1)[1])
-                    seconds = ms / 1_000_000.0
-                    # Aproximamos frames procesados por tiempo
-                    est_now = int((seconds - last_out_time) * (fps / max(1, every_n)))
-                    if est_now > 0:
-                        pbar.update(est_now)
-                        last_out_time = seconds
-                except:
-                    pass
+        cur = 0
+        for cur in _iter_progress_frames(proc.stdout):
+            # Redibujar tqdm a cada evento cuesta más que el propio parseo: limitamos a ~4/s
+            now = time.monotonic()
+            if now - last_render >= PROGRESS_INTERVAL and cur > last_frames_counted:
+                pbar.update(cur - last_frames_counted)
+                last_frames_counted = cur
+                last_render = now
+        if cur > last_frames_counted:
+            pbar.update(cur - last_frames_counted)
     finally:
         proc.wait()
         # Completar si quedó corto por redondeos
@@ -215,6 +587,705 @@ def ffmpeg_extract_frames(video_path: Path, output_dir: Path, every_n: int = 1,
         raise subprocess.CalledProcessError(proc.returncode, cmd)
 
 
+# ---- Extracción en paralelo (varios ffmpeg por tramos) ------------------------
+# Duración mínima de cada tramo; por debajo no compensa lanzar otro ffmpeg
+MIN_SHARD_SECONDS = 10.0
+
+
+def shard_time_range(start_s: float, end_s: float, fps: float, every_n: int,
+                     workers: int) -> List[Tuple[float, float, int]]:
+    """Divide [start_s, end_s) en tramos y devuelve [(ss, to, start_number), ...].
+
+    Cada tramo abarca un múltiplo de `every_n` frames de origen, así el `select`
+    de cada worker sigue en fase y la numeración global queda continua. Los cortes
+    caen a medio frame para que ningún frame quede en dos tramos. El último también
+    termina a medio frame, antes del primero en `end_s` o después: como en la
+    extracción en un solo proceso, un frame justo en `end_s` no se incluye.
+    """
+    # Índices (en la rejilla del video, no relativos a `start_s`) del primer frame que
+    # entra y del primero que ya no; el margen absorbe el error de coma flotante de
+    # tiempos como 27.3 * 30
+    g0 = math.ceil(start_s * fps - 1e-6)
+    g_end = math.ceil(end_s * fps - 1e-6)
+    total_src = max(0, g_end - g0)
+    per_chunk = math.ceil(total_src / workers)
+    per_chunk = max(every_n, math.ceil(per_chunk / every_n) * every_n)
+    half = 0.5 / fps
+
+    shards = []
+    for first in range(0, total_src, per_chunk):
+        last = min(first + per_chunk, total_src)
+        ss = (g0 + first) / fps - half if first > 0 else start_s
+        to = (g0 + last) / fps - half
+        shards.append((ss, to, 1 + first // every_n))
+    return shards
+
+
+def _extract_sharded(head: List[str], src: str, out_opts: List[str], out_pattern: str,
+                     shards: List[Tuple[float, float, int]], est_frames: int) -> None:
+    """Lanza un ffmpeg por tramo y suma el `frame=` de cada uno en una sola barra.
+
+    `-ss` y `-to` van como opciones de entrada: `-to` es una posición absoluta del
+    video (una duración `-t` con redondeo a µs podría incluir el frame justo en el final).
+    """
+    pbar = tqdm(total=est_frames, unit="frame", desc=f"Extrayendo ({len(shards)} procesos)", **PBAR_OPTS)
+    procs: List[Tuple[List[str], subprocess.Popen]] = []
+    try:
+        for ss, to, start_number in shards:
+            cmd = head + ["-ss", f"{ss:.6f}", "-to", f"{to:.6f}", "-i", src] + out_opts
+            cmd += ["-start_number", str(start_number), out_pattern]
+            procs.append((cmd, subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                                bufsize=PROGRESS_BUFSIZE)))
+
+        counts = [0] * len(procs)
+        last_render = 0.0
+        for i, cur in _read_progress_many([p.stdout for _, p in procs]):
+            if cur is None:
+                # Fin del pipe: si ese tramo falló no tiene sentido esperar a los demás
+                cmd, proc = procs[i]
+                if proc.wait() != 0:
+                    raise subprocess.CalledProcessError(proc.returncode, cmd)
+                continue
+            counts[i] = cur
+            now = time.monotonic()
+            if now - last_render >= PROGRESS_INTERVAL:
+                pbar.update(sum(counts) - pbar.n)
+                last_render = now
+    finally:
+        # Si un tramo falla (o Ctrl+C), no dejamos a los demás corriendo
+        for _, proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+        if pbar.n < est_frames:
+            pbar.update(est_frames - pbar.n)
+        pbar.close()
+
+
+# ---- Extracción por pipe rawvideo + codificación en Python -------------------
+# Hilos de escritura por codificador y máximo de imágenes ya codificadas esperando disco
+WRITE_THREADS = 2
+MAX_PENDING_WRITES = 8
+
+# Formato crudo de ffmpeg y modo de Pillow según los canales por píxel
+RAW_PIX_FMTS = {1: "gray", 3: "rgb24"}
+PIL_MODES = {1: "L", 3: "RGB"}
+
+
+def _encode_frame(view: memoryview, width: int, height: int, image_format: str,
+                  channels: int = 3) -> bytes:
+    """Codifica un frame RGB24 (o gris de 8 bits si `channels` es 1) a PNG/JPG en memoria.
+
+    Para PNG se prefiere fpng (filtro y Adler-32 con SSE4.1, varias veces más rápido
+    que zlib); si no está instalado, o el frame es gris (fpng solo admite RGB/RGBA), Pillow.
+    """
+    if image_format == "png" and fpng_py is not None and channels == 3:
+        # fpng solo acepta `bytes`: la copia (un memcpy) es despreciable frente a codificar
+        return fpng_py.fpng_encode_image_to_memory(bytes(view), width, height, 3)
+    buf = io.BytesIO()
+    mode = PIL_MODES[channels]
+    img = Image.frombuffer(mode, (width, height), view, "raw", mode, 0, 1)
+    if image_format == "jpg":
+        img.save(buf, format="JPEG", quality=95)
+    else:
+        # Nivel 1: mucho más rápido que el 6 por defecto, archivos algo mayores
+        img.save(buf, format="PNG", compress_level=1)
+    del img
+    return buf.getvalue()
+
+
+def _encode_worker(frames: "multiprocessing.Queue", free_slots: "multiprocessing.Queue",
+                   shm_name: str, output_dir: str, image_format: str, width: int, height: int,
+                   channels: int = 3) -> None:
+    """Proceso hijo: toma (índice, slot) de la cola, codifica el frame del anillo y lo guarda.
+
+    La codificación se hace en memoria y la escritura a disco se delega a hilos, así
+    el proceso pasa al frame siguiente mientras el anterior aún se está guardando
+    (clave en discos lentos o carpetas de red).
+    """
+    frame_size = width * height * channels
+    ring = shared_memory.SharedMemory(name=shm_name)
+    pending = threading.BoundedSemaphore(MAX_PENDING_WRITES)
+    errors: List[BaseException] = []
+
+    def write(path: str, payload: bytes) -> None:
+        try:
+            with open(path, "wb") as f:
+                f.write(payload)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            pending.release()
+
+    try:
+        with ThreadPoolExecutor(max_workers=WRITE_THREADS) as writers:
+            while not errors:
+                item = frames.get()
+                if item is None:
+                    break
+                idx, slot = item
+                with ring.buf[slot * frame_size:(slot + 1) * frame_size] as view:
+                    payload = _encode_frame(view, width, height, image_format, channels)
+                # El slot ya no se lee: el lector puede reutilizarlo
+                free_slots.put(slot)
+                pending.acquire()
+                path = os.path.join(output_dir, f"frame_{idx:06d}.{image_format}")
+                writers.submit(write, path, payload)
+    finally:
+        ring.close()
+    if errors:
+        raise errors[0]
+
+
+def _extract_rawpipe(cmd: List[str], stdin: Optional[IO[bytes]], output_dir: Path, image_format: str,
+                     width: int, height: int, est_frames: int, dedup: Optional[str] = None,
+                     channels: int = 3) -> None:
+    """ffmpeg entrega RGB24 (o gris) crudo por stdout y un pool de procesos codifica las imágenes."""
+    cmd = cmd + ["-f", "rawvideo", "-pix_fmt", RAW_PIX_FMTS[channels], "pipe:1"]
+    frame_size = width * height * channels
+    proc = subprocess.Popen(cmd, stdin=stdin, stdout=subprocess.PIPE, bufsize=frame_size)
+    try:
+        _encode_pool(lambda view: _read_exact(proc.stdout, view) == frame_size,
+                     output_dir, image_format, width, height, est_frames, dedup, channels)
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+
+def _extract_pyav(stdin: IO[bytes], output_dir: Path, image_format: str, width: int, height: int,
+                  est_frames: int, start_s: float, end_s: Optional[float], every_n: int,
+                  dedup: Optional[str] = None, channels: int = 3) -> None:
+    """Decodifica en proceso con PyAV (sin ffmpeg hijo) y reparte la codificación en el pool."""
+    frames = _iter_pyav_frames(stdin, start_s, end_s, every_n)
+
+    def fill(view: memoryview) -> bool:
+        frame = next(frames, None)
+        if frame is None:
+            return False
+        src = frame.to_ndarray(format=RAW_PIX_FMTS[channels])
+        np.frombuffer(view, dtype=np.uint8).reshape(src.shape)[...] = src
+        return True
+
+    try:
+        _encode_pool(fill, output_dir, image_format, width, height, est_frames, dedup, channels)
+    finally:
+        frames.close()
+
+
+class _ReadOnlyPipe:
+    """Expone solo `read` para que PyAV trate la entrada como no buscable (sin seek)."""
+
+    def __init__(self, stream: IO[bytes]):
+        self.read = stream.read
+
+
+def _iter_pyav_frames(stdin: IO[bytes], start_s: float, end_s: Optional[float],
+                      every_n: int) -> Iterator["av.VideoFrame"]:
+    """Produce los frames seleccionados: mismo rango y muestreo que `-ss`/`-to` y `select`."""
+    container = av.open(_ReadOnlyPipe(stdin), mode="r")
+    try:
+        stream = container.streams.video[0]
+        # Decodificación multihilo dentro de libavcodec
+        stream.thread_type = "AUTO"
+        n = 0
+        for frame in container.decode(stream):
+            t = frame.time
+            if t is not None:
+                # Un pipe no admite seek: descartamos hasta el inicio, como hace `-ss` con pipes
+                if t < start_s:
+                    continue
+                if end_s is not None and t >= end_s:
+                    break
+            n += 1
+            if (n - 1) % every_n:
+                continue
+            yield frame
+    finally:
+        container.close()
+
+
+def _encode_pool(fill: Callable[[memoryview], bool], output_dir: Path, image_format: str,
+                 width: int, height: int, est_frames: int, dedup: Optional[str] = None,
+                 channels: int = 3) -> None:
+    """Reparte la codificación de imágenes RGB24 (o grises, con `channels` = 1) entre varios procesos.
+
+    `fill(view)` escribe el siguiente frame en `view` y devuelve False al terminar.
+    Los frames van a un anillo de buffers en memoria compartida, reservado una sola
+    vez: a los codificadores solo viaja el número de slot, sin crear ni copiar
+    (pickle) un objeto de varios MB por frame.
+    """
+    frame_size = width * height * channels
+    n_workers = max(1, (os.cpu_count() or 1) - 1)
+    n_slots = 2 * n_workers
+
+    ring = shared_memory.SharedMemory(create=True, size=n_slots * frame_size)
+    # "spawn" también en Linux: con fork los codificadores heredarían todos los
+    # descriptores abiertos, incluido el extremo de escritura del pipe de entrada
+    # (ver extract_while_downloading), y el lector nunca vería EOF.
+    ctx = multiprocessing.get_context("spawn")
+    # Slots libres: si los codificadores van lentos, la lectura de frames se frena
+    free_slots = ctx.Queue()
+    for slot in range(n_slots):
+        free_slots.put(slot)
+    frames = ctx.Queue()
+    workers = [
+        ctx.Process(target=_encode_worker,
+                    args=(frames, free_slots, ring.name, str(output_dir),
+                          image_format, width, height, channels),
+                    daemon=True)
+        for _ in range(n_workers)
+    ]
+    for w in workers:
+        w.start()
+
+    is_duplicate = _make_dedup(dedup, width, height, channels) if dedup else None
+    pbar = tqdm(total=est_frames if est_frames > 0 else None, unit="frame", desc="Extrayendo", **PBAR_OPTS)
+    idx = 0
+    processed = 0
+    last_render = 0.0
+    try:
+        while True:
+            slot = _next_free_slot(free_slots, workers)
+            with ring.buf[slot * frame_size:(slot + 1) * frame_size] as view:
+                if not fill(view):
+                    break
+                duplicate = is_duplicate is not None and is_duplicate(view)
+            processed += 1
+            if duplicate:
+                # Repetido: no se codifica y el slot vuelve a quedar libre
+                free_slots.put(slot)
+            else:
+                idx += 1
+                frames.put((idx, slot))
+            now = time.monotonic()
+            if now - last_render >= PROGRESS_INTERVAL:
+                _check_workers(workers)
+                pbar.update(processed - pbar.n)
+                if dedup:
+                    pbar.set_postfix(omitidos=processed - idx, refresh=False)
+                last_render = now
+        pbar.update(processed - pbar.n)
+        if dedup:
+            pbar.set_postfix(omitidos=processed - idx)
+        for _ in workers:
+            frames.put(None)
+        for w in workers:
+            w.join()
+        if any(w.exitcode != 0 for w in workers):
+            raise EncoderPoolError("Los procesos de codificación de imágenes terminaron con error.")
+    finally:
+        for w in workers:
+            if w.is_alive():
+                w.terminate()
+        pbar.close()
+        ring.close()
+        ring.unlink()
+
+
+# Ventana de frames recientes y distancia de Hamming máxima (de 64 bits) para "similar"
+DEDUP_WINDOW = 8
+DEDUP_MAX_DISTANCE = 4
+
+
+def _make_dedup(mode: str, width: int, height: int, channels: int = 3) -> Callable[[memoryview], bool]:
+    """Devuelve una función que indica si el frame (RGB24 o gris) ya se vio antes.
+
+    "exact": SHA-256 (truncado a 128 bits) del frame completo contra todos los vistos;
+    hashlib usa OpenSSL, que aprovecha las instrucciones SHA de la CPU si existen.
+    "similar": dHash de 64 bits (miniatura 9x8 en grises) comparado por distancia de
+    Hamming con los últimos frames, para descartar también los casi idénticos.
+    """
+    if mode == "exact":
+        seen = set()
+
+        def is_duplicate(view: memoryview) -> bool:
+            digest = hashlib.sha256(view).digest()[:16]
+            if digest in seen:
+                return True
+            seen.add(digest)
+            return False
+
+        return is_duplicate
+
+    recent: "deque[int]" = deque(maxlen=DEDUP_WINDOW)
+
+    def is_duplicate(view: memoryview) -> bool:
+        pil_mode = PIL_MODES[channels]
+        img = Image.frombuffer(pil_mode, (width, height), view, "raw", pil_mode, 0, 1)
+        px = img.resize((9, 8), Image.BILINEAR).convert("L").tobytes()
+        del img
+        h = 0
+        for row in range(8):
+            for col in range(row * 9, row * 9 + 8):
+                h = (h << 1) | (px[col] < px[col + 1])
+        if any(bin(h ^ prev).count("1") <= DEDUP_MAX_DISTANCE for prev in recent):
+            return True
+        recent.append(h)
+        return False
+
+    return is_duplicate
+
+
+def _next_free_slot(free_slots: "multiprocessing.Queue", workers: List[multiprocessing.Process]) -> int:
+    """Espera un slot libre; falla si algún codificador terminó antes de tiempo."""
+    while True:
+        try:
+            return free_slots.get(timeout=1.0)
+        except queue.Empty:
+            _check_workers(workers)
+
+
+def _check_workers(workers: List[multiprocessing.Process]) -> None:
+    """Falla si algún codificador terminó antes de recibir el aviso de fin.
+
+    Un proceso caído se queda con su frame y su slot: seguir enviando frames a los
+    demás solo produciría un resultado incompleto.
+    """
+    if any(w.exitcode is not None for w in workers):
+        raise EncoderPoolError("Los procesos de codificación de imágenes terminaron con error.")
+
+
+def _read_exact(stream: IO[bytes], view: memoryview) -> int:
+    """Llena `view` desde `stream`; devuelve los bytes leídos (menos solo al final del pipe)."""
+    got = 0
+    while got < len(view):
+        n = stream.readinto(view[got:])
+        if not n:
+            break
+        got += n
+    return got
+
+
+# ---- Flujo en streaming -------------------------------------------------------
+def run_streaming(url: str, tmpdir: Path, ff_dir: Optional[str], out_dir: Path,
+                  pick_out_dir: Optional[Callable[[Dict[str, Any]], Path]] = None,
+                  **extract_kwargs) -> None:
+    """Descarga y extrae a la vez: la salida de yt-dlp alimenta directamente a ffmpeg.
+
+    `extract_kwargs` se pasan tal cual a `ffmpeg_extract_frames` (every_n, start_ts, ...).
+    `pick_out_dir`, si se indica, elige la carpeta de salida a partir de la info del video.
+    """
+    print("\nDescargando y extrayendo fotogramas en paralelo...")
+    try:
+        ydl_proc, video_info = stream_youtube(url, tmpdir, ff_dir)
+    except Exception as e:
+        print("Error al descargar el video:", file=sys.stderr)
+        print(str(e), file=sys.stderr)
+        sys.exit(3)
+    if pick_out_dir is not None:
+        out_dir = pick_out_dir(video_info)
+
+    reached_eof = False
+    try:
+        ffmpeg_extract_frames(None, out_dir, stdin=ydl_proc.stdout, video_info=video_info,
+                              **extract_kwargs)
+        if extract_kwargs.get("end_ts"):
+            # Con tiempo de fin ffmpeg puede parar antes: si aún quedan datos, yt-dlp sobra
+            reached_eof = not ydl_proc.stdout.read(1)
+        else:
+            # Sin él, ffmpeg leyó el video entero: se descarta lo que quede tras el final
+            while ydl_proc.stdout.read(PROGRESS_CHUNK):
+                pass
+            reached_eof = True
+    except EXTRACT_ERRORS:
+        # Un video cortado porque yt-dlp falló también rompe la decodificación
+        if ydl_proc.poll() not in (None, 0):
+            print(f"Error al descargar el video: yt-dlp terminó con código {ydl_proc.returncode}.",
+                  file=sys.stderr)
+            sys.exit(3)
+        print("FFmpeg reportó un error al extraer los frames.", file=sys.stderr)
+        sys.exit(4)
+    finally:
+        # Si ffmpeg terminó antes (p.ej. por -to), yt-dlp ya no tiene quién lea: lo paramos.
+        ydl_proc.stdout.close()
+        if not reached_eof and ydl_proc.poll() is None:
+            ydl_proc.terminate()
+        ydl_proc.wait()
+
+    # Un pipe cortado parece un EOF normal: solo el código de yt-dlp dice si llegó todo
+    if reached_eof and ydl_proc.returncode != 0:
+        print(f"Error al descargar el video: yt-dlp terminó con código {ydl_proc.returncode}; "
+              "los frames extraídos están incompletos.", file=sys.stderr)
+        sys.exit(3)
+
+
+# ---- Descarga en segundo plano + extracción sobre el archivo en crecimiento --
+# Cada cuánto (s) se vuelve a sondear el archivo parcial y tamaño de lectura al seguirlo
+POLL_INTERVAL = 0.5
+TAIL_CHUNK = 1 << 20
+
+
+class BackgroundDownload:
+    """Ejecuta `download_youtube` en un hilo y expone la ruta en cuanto existe."""
+
+    def __init__(self, url: str, tmpdir: Path, ff_dir: Optional[str]):
+        self.path: Optional[Path] = None
+        self.error: Optional[BaseException] = None
+        self._result: Optional[Path] = None
+        self._done = threading.Event()
+        # daemon: un Ctrl+C no debe quedar esperando a que termine la descarga
+        self._thread = threading.Thread(target=self._run, args=(url, tmpdir, ff_dir), daemon=True)
+        self._thread.start()
+
+    def _run(self, url: str, tmpdir: Path, ff_dir: Optional[str]) -> None:
+        try:
+            self._result = download_youtube(url, tmpdir, ff_dir, on_file=self._set_path)
+        except BaseException as e:
+            self.error = e
+        finally:
+            self._done.set()
+
+    def _set_path(self, path: Path) -> None:
+        self.path = path
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self) -> Path:
+        """Espera a que termine y devuelve la ruta final (o relanza el error de yt-dlp)."""
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self._result
+
+
+def wait_until_probeable(download: BackgroundDownload) -> Optional[Dict[str, Any]]:
+    """Sondea el archivo parcial hasta que ffprobe ve duración y resolución.
+
+    Devuelve la info si el archivo ya es legible durante la descarga (p.ej. MP4
+    fragmentado o con el moov al inicio), o None si la descarga terminó antes.
+    Se exigen dos sondeos iguales seguidos para no fiarse de una cabecera a medias.
+    """
+    previous = None
+    while not download.done():
+        time.sleep(POLL_INTERVAL)
+        if download.path is None or not download.path.is_file():
+            continue
+        try:
+            # Sin caché: un archivo a medio escribir puede cambiar entre sondeos
+            info = _probe_video_info.__wrapped__(str(download.path))
+        except subprocess.CalledProcessError:
+            continue
+        if info["duration"] <= 0 or info["width"] <= 0:
+            continue
+        if info == previous:
+            return info
+        previous = info
+    return None
+
+
+def _tail_file(path: Path, finished: Callable[[], bool], sink: IO[bytes]) -> None:
+    """Copia `path` a `sink` siguiendo su crecimiento hasta que la descarga termine."""
+    try:
+        with open(path, "rb") as src:
+            while True:
+                # Se consulta antes de leer: si ya terminó, lo que quede se lee hasta EOF
+                done = finished()
+                chunk = src.read(TAIL_CHUNK)
+                if chunk:
+                    sink.write(chunk)
+                elif done:
+                    break
+                else:
+                    time.sleep(POLL_INTERVAL / 5)
+    except BrokenPipeError:
+        # ffmpeg terminó antes (p.ej. alcanzó el tiempo de fin): no hace falta más
+        pass
+    finally:
+        try:
+            sink.close()
+        except BrokenPipeError:
+            pass
+
+
+def extract_while_downloading(download: BackgroundDownload, out_dir: Path, video_info: Dict[str, Any],
+                              **extract_kwargs) -> None:
+    """Extrae frames del archivo que se está descargando, pasándolo a ffmpeg por un pipe.
+
+    El pipe (en lugar de abrir el archivo directamente) hace que ffmpeg no vea un EOF
+    falso cuando la red va más lenta que la decodificación: el lector espera a que
+    lleguen más bytes y cierra el pipe solo cuando la descarga ha terminado.
+    """
+    read_fd, write_fd = os.pipe()
+    with os.fdopen(read_fd, "rb") as reader:
+        feeder = threading.Thread(target=_tail_file,
+                                  args=(download.path, download.done, os.fdopen(write_fd, "wb")),
+                                  daemon=True)
+        feeder.start()
+        ffmpeg_extract_frames(None, out_dir, stdin=reader, video_info=video_info, **extract_kwargs)
+    feeder.join()
+
+
+# ---- Caché de frames entre ejecuciones ----------------------------------------
+# Raíz de la caché y tamaño máximo (bytes) antes de borrar las entradas menos usadas
+CACHE_ROOT = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "youtube_frames_to_png"
+CACHE_MAX_BYTES = 10_000 * BYTES_PER_MB
+CACHE_PARTIAL_SUFFIX = ".partial"
+# Una extracción a medias sin escrituras en este tiempo (s) se da por abandonada
+CACHE_PARTIAL_MAX_AGE = 3600
+# Con esta variable de entorno (p.ej. YOUTUBE_FRAMES_NO_CACHE=1) no se usa la caché
+CACHE_DISABLE_ENV = "YOUTUBE_FRAMES_NO_CACHE"
+# Fracción aproximada (holgada) del tamaño en crudo que ocupa cada imagen codificada
+ENCODED_SIZE_RATIO = {"png": 0.6, "jpg": 0.15}
+
+
+def video_id_from_url(url: str) -> Optional[str]:
+    """Obtiene el ID del video que descargará yt-dlp, o None si no se puede saber.
+
+    Si el URL es de un solo video, el ID sale del propio URL (sin red). Si no (p.ej.
+    `watch?v=...&list=...`, cuyo extractor es el de listas y su ID el de la lista),
+    se resuelve con yt-dlp usando `noplaylist`, igual que en la descarga.
+    """
+    from yt_dlp.extractor import gen_extractor_classes
+    for ie in gen_extractor_classes():
+        if not ie.suitable(url):
+            continue
+        # El extractor genérico no da IDs únicos (suele ser el nombre del archivo): sin caché
+        if ie.ie_key() == "Generic":
+            return None
+        if ie.is_single_video(url):
+            return ie.get_temp_id(url)
+        break
+    try:
+        with YoutubeDL({"quiet": True, "no_warnings": True, "noplaylist": True}) as ydl:
+            info = ydl.extract_info(url, download=False, process=False)
+    except Exception:
+        return None
+    kind = info.get("_type", "video")
+    if kind in ("url", "url_transparent") and info.get("url") and info["url"] != url:
+        # Redirige a la página del video concreto: su URL ya da el ID
+        return video_id_from_url(info["url"])
+    if kind == "video" and info.get("extractor_key") != "Generic":
+        return info.get("id")
+    return None
+
+
+def frame_cache_dir(url: str, params: List[Any]) -> Optional[Path]:
+    """Carpeta de caché para este video y estos parámetros de extracción, o None.
+
+    La clave es el SHA-256 de los parámetros que cambian las imágenes resultantes:
+    al repetir con el mismo rango y muestreo se reutilizan sin descargar ni decodificar.
+    Devuelve None si la caché está desactivada con `CACHE_DISABLE_ENV`.
+    """
+    if os.environ.get(CACHE_DISABLE_ENV):
+        return None
+    video_id = video_id_from_url(url)
+    if not video_id:
+        return None
+    key = hashlib.sha256(json.dumps([video_id] + params).encode()).hexdigest()
+    return CACHE_ROOT / video_id / key
+
+
+def can_hardlink(src_dir: Path, dst_dir: Path) -> bool:
+    """True si se pueden crear hardlinks de `src_dir` a `dst_dir` (mismo sistema de archivos)."""
+    try:
+        src_dir.mkdir(parents=True, exist_ok=True)
+        dst_dir.mkdir(parents=True, exist_ok=True)
+        fd, probe = tempfile.mkstemp(dir=src_dir, prefix=".link-test-")
+    except OSError:
+        return False
+    os.close(fd)
+    target = os.path.join(dst_dir, os.path.basename(probe))
+    try:
+        os.link(probe, target)
+        os.unlink(target)
+        return True
+    except OSError:
+        return False
+    finally:
+        os.unlink(probe)
+
+
+def estimate_output_bytes(video_info: Dict[str, Any], every_n: int = 1, start_ts: Optional[str] = None,
+                          end_ts: Optional[str] = None, target_fps: Optional[str] = None,
+                          image_format: str = "png", gray: bool = False,
+                          scale: Optional[Tuple[int, int]] = None, **_) -> int:
+    """Bytes aproximados que ocuparán las imágenes (0 si no se conoce la resolución).
+
+    Acepta los mismos argumentos que `ffmpeg_extract_frames` e ignora los que no influyen.
+    """
+    width, height = video_info["width"], video_info["height"]
+    if scale:
+        width, height = scaled_size(width, height, scale)
+    if width <= 0 or height <= 0:
+        return 0
+    frames = estimate_frames(video_info, every_n, start_ts, end_ts, target_fps)
+    raw = frames * width * height * (1 if gray else 3)
+    return int(raw * ENCODED_SIZE_RATIO.get(image_format, 1.0))
+
+
+def cache_hit(cache_dir: Path) -> bool:
+    """True si la entrada existe y está completa (se renombra al final de la extracción)."""
+    try:
+        return any(cache_dir.iterdir())
+    except OSError:
+        return False
+
+
+def link_frames(src_dir: Path, dst_dir: Path) -> int:
+    """Enlaza (hardlink, sin copiar datos) las imágenes de `src_dir` en `dst_dir`.
+
+    Si están en distintos sistemas de archivos se copian. No se usan symlinks: la
+    entrada de caché puede borrarse después y dejaría enlaces rotos.
+    """
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    n = 0
+    for entry in os.scandir(src_dir):
+        if not entry.is_file():
+            continue
+        dst = os.path.join(dst_dir, entry.name)
+        # Igual que ffmpeg: una imagen previa con el mismo nombre se sobrescribe
+        if os.path.lexists(dst):
+            os.unlink(dst)
+        try:
+            os.link(entry.path, dst)
+        except OSError:
+            shutil.copyfile(entry.path, dst)
+        n += 1
+    # Marca de uso explícita: muchos sistemas montan con noatime/relatime
+    os.utime(src_dir)
+    return n
+
+
+def evict_frame_cache(max_bytes: int = CACHE_MAX_BYTES) -> None:
+    """Borra las entradas de caché usadas hace más tiempo hasta bajar de `max_bytes`.
+
+    El último uso se lee de `st_mtime`, que `link_frames` actualiza con `os.utime`:
+    `st_atime` cambiaría con solo listar la carpeta (o nunca, con noatime).
+    También borra las extracciones a medias abandonadas (p.ej. si el proceso murió).
+    La entrada recién escrita es la más reciente: solo se borra si por sí sola ya
+    supera el límite (las imágenes de la salida siguen ahí, son hardlinks).
+    """
+    entries = []
+    total = 0
+    now = time.time()
+    for video_dir in CACHE_ROOT.glob("*"):
+        for entry_dir in video_dir.glob("*"):
+            if not entry_dir.is_dir():
+                continue
+            if entry_dir.name.endswith(CACHE_PARTIAL_SUFFIX):
+                # Las recientes pueden ser de otra ejecución en curso: se respetan
+                if now - entry_dir.stat().st_mtime > CACHE_PARTIAL_MAX_AGE:
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(entry_dir) if f.is_file())
+            entries.append((entry_dir.stat().st_mtime, size, entry_dir))
+            total += size
+    for _, size, entry_dir in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total -= size
+        try:
+            # Quita la carpeta del video si ya no le quedan entradas
+            entry_dir.parent.rmdir()
+        except OSError:
+            pass
+
+
 # ---- Main --------------------------------------------------------------------
 def main():
     print("=== Extraer fotogramas PNG desde un video de YouTube ===\n")
@@ -225,6 +1296,9 @@ def main():
     except FileNotFoundError as e:
         print(str(e), file=sys.stderr)
         sys.exit(2)
+    hwaccel = detect_hwaccel()
+    if hwaccel:
+        print("Decodificación por hardware: disponible (-hwaccel auto)")
 
     url = ask("Pega el URL del video de YouTube")
     if not url:
@@ -235,43 +1309,141 @@ def main():
                        default=str(Path.cwd() / "frames_output"))).expanduser().resolve()
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    try:
-        every_n = int(ask("Extraer 1 de cada N frames (1 = todos)", default="1"))
-        if every_n < 1:
+    # FPS de salida y "1 de cada N" son excluyentes: si se da FPS no se pregunta N
+    target_fps = ask("FPS de salida (p.ej. 1 o 1/5; vacío = usar 1 de cada N)", default="").strip() or None
+    if target_fps:
+        try:
+            if Fraction(target_fps) <= 0:
+                raise ValueError
+        except (ValueError, ZeroDivisionError):
+            print(f"FPS inválido: {target_fps!r}. Se extraerán todos los frames.", file=sys.stderr)
+            target_fps = None
+
+    every_n = 1
+    if not target_fps:
+        try:
+            every_n = int(ask("Extraer 1 de cada N frames (1 = todos)", default="1"))
+            if every_n < 1:
+                every_n = 1
+        except ValueError:
             every_n = 1
-    except ValueError:
-        every_n = 1
 
     start_ts = ask("Tiempo de inicio (HH:MM:SS o vacío para todo)", default="").strip() or None
     end_ts = ask("Tiempo de fin (HH:MM:SS o vacío para todo)", default="").strip() or None
 
-    with tempfile.TemporaryDirectory() as td:
-        tmpdir = Path(td)
-        print("\nDescargando video con yt-dlp (puede tardar un poco)...")
-        try:
-            video_path = download_youtube(url, tmpdir, ff_dir)
-        except FileNotFoundError as e:
-            print(f"Error al descargar el video: {e}", file=sys.stderr)
-            sys.exit(3)
-        except Exception as e:
-            print("Error al descargar el video:", file=sys.stderr)
-            print(str(e), file=sys.stderr)
-            print("\nSugerencias:", file=sys.stderr)
-            print("  1) En Windows, instala FFmpeg: winget install Gyan.FFmpeg", file=sys.stderr)
-            print("  2) Asegúrate de que 'ffmpeg' y 'ffprobe' estén en el PATH y reinicia la terminal.", file=sys.stderr)
-            print("  3) Verifica que puedas ejecutar: ffmpeg -version  y  ffprobe -version", file=sys.stderr)
-            sys.exit(3)
+    image_format = ask("Formato de imagen (png/jpg)", default="png").lower()
+    if image_format == "jpeg":
+        image_format = "jpg"
+    if image_format not in ("png", "jpg"):
+        image_format = "png"
 
-        print(f"Video descargado: {video_path.name}")
-        print("Extrayendo fotogramas a PNG...")
-        try:
-            ffmpeg_extract_frames(video_path, out_dir, every_n=every_n, start_ts=start_ts, end_ts=end_ts)
-        except subprocess.CalledProcessError:
-            print("FFmpeg reportó un error al extraer los frames.", file=sys.stderr)
-            sys.exit(4)
+    dedup = {"exactos": "exact", "similares": "similar"}.get(
+        ask("Omitir frames repetidos (no/exactos/similares)", default="no").lower())
+    if dedup and Image is None:
+        print("Omitir repetidos requiere Pillow (pip install pillow). Se guardarán todos.", file=sys.stderr)
+        dedup = None
+
+    # Menos canales y menos píxeles: menos bytes que codificar y escribir por frame
+    gray = ask("¿Guardar en escala de grises? (s/N)", default="n").lower().startswith("s")
+    size_text = ask("Redimensionar a ANCHOxALTO (p.ej. 640x360; -1 conserva proporción; vacío = original)",
+                    default="").strip()
+    scale = parse_size(size_text) if size_text else None
+    if size_text and scale is None:
+        print(f"Tamaño inválido: {size_text!r}. Se usará la resolución original.", file=sys.stderr)
+
+    streaming = ask("¿Extraer mientras se descarga? Usa el MP4 progresivo, de menor calidad (s/N)",
+                    default="n").lower().startswith("s")
+
+    extract_kwargs = dict(every_n=every_n, start_ts=start_ts, end_ts=end_ts,
+                          image_format=image_format, hwaccel=hwaccel, target_fps=target_fps,
+                          dedup=dedup, gray=gray, scale=scale)
+
+    # Mismo video y mismos parámetros que una ejecución anterior: se reutilizan sus imágenes
+    cache_dir = frame_cache_dir(url, [start_ts, end_ts, every_n, target_fps, image_format,
+                                      dedup, gray, scale, streaming])
+    if cache_dir is not None and cache_hit(cache_dir):
+        n = link_frames(cache_dir, out_dir)
+        print(f"\n{n} imágenes tomadas de la caché ({cache_dir}); sin descargar ni extraer.")
+        print(f"\nListo. Imágenes {image_format.upper()} en: {out_dir}")
+        return
+
+    # Se extrae a una carpeta temporal de la caché y se publica solo si todo terminó bien.
+    # Sin hardlinks hacia la salida (otro disco) cada imagen se escribiría dos veces:
+    # en ese caso se extrae directamente en la salida, sin caché.
+    partial_dir = None
+    if cache_dir is not None and can_hardlink(CACHE_ROOT, out_dir):
+        partial_dir = cache_dir.with_name(cache_dir.name + CACHE_PARTIAL_SUFFIX)
+        shutil.rmtree(partial_dir, ignore_errors=True)
+
+    def extract_dir_for(video_info: Dict[str, Any]) -> Path:
+        """Carpeta de extracción: la de la caché, salvo que el resultado estimado no quepa."""
+        nonlocal partial_dir
+        if partial_dir is not None and estimate_output_bytes(video_info, **extract_kwargs) > CACHE_MAX_BYTES:
+            print("La extracción estimada supera el tamaño de la caché: se guarda solo en la salida.")
+            partial_dir = None
+        return partial_dir or out_dir
+
+    try:
+        with tempfile.TemporaryDirectory() as td:
+            tmpdir = Path(td)
+            if streaming:
+                run_streaming(url, tmpdir, ff_dir, out_dir, pick_out_dir=extract_dir_for,
+                              **extract_kwargs)
+            else:
+                print("\nDescargando video con yt-dlp (puede tardar un poco)...")
+                download = BackgroundDownload(url, tmpdir, ff_dir)
+                # Si el archivo parcial ya es legible, la extracción arranca sin esperar a la red
+                video_info = wait_until_probeable(download)
+                if video_info is not None:
+                    print(f"Extrayendo fotogramas a {image_format.upper()} mientras se descarga...")
+                    try:
+                        extract_while_downloading(download, extract_dir_for(video_info), video_info,
+                                                  **extract_kwargs)
+                    except EXTRACT_ERRORS:
+                        # Si lo que falló fue la descarga, se informa abajo con sus sugerencias
+                        if download.error is None:
+                            print("FFmpeg reportó un error al extraer los frames.", file=sys.stderr)
+                            sys.exit(4)
+
+                try:
+                    video_path = download.wait()
+                except FileNotFoundError as e:
+                    print(f"Error al descargar el video: {e}", file=sys.stderr)
+                    sys.exit(3)
+                except Exception as e:
+                    print("Error al descargar el video:", file=sys.stderr)
+                    print(str(e), file=sys.stderr)
+                    print("\nSugerencias:", file=sys.stderr)
+                    print("  1) En Windows, instala FFmpeg: winget install Gyan.FFmpeg", file=sys.stderr)
+                    print("  2) Asegúrate de que 'ffmpeg' y 'ffprobe' estén en el PATH y reinicia la terminal.", file=sys.stderr)
+                    print("  3) Verifica que puedas ejecutar: ffmpeg -version  y  ffprobe -version", file=sys.stderr)
+                    sys.exit(3)
+
+                print(f"Video descargado: {video_path.name}")
+                if video_info is None:
+                    print(f"Extrayendo fotogramas a {image_format.upper()}...")
+                    try:
+                        video_info = probe_video_info(video_path)
+                        ffmpeg_extract_frames(video_path, extract_dir_for(video_info),
+                                              video_info=video_info, **extract_kwargs)
+                    except EXTRACT_ERRORS:
+                        print("FFmpeg reportó un error al extraer los frames.", file=sys.stderr)
+                        sys.exit(4)
+
+        if partial_dir is not None:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            os.replace(partial_dir, cache_dir)
+    finally:
+        # Una extracción fallida o interrumpida no debe quedarse ocupando la caché
+        if partial_dir is not None:
+            shutil.rmtree(partial_dir, ignore_errors=True)
+
+    if partial_dir is not None:
+        link_frames(cache_dir, out_dir)
+        evict_frame_cache()
 
-    print(f"\nListo. Imágenes PNG en: {out_dir}")
-    print("Ejemplos: frame_000001.png, frame_000002.png, ...")
+    print(f"\nListo. Imágenes {image_format.upper()} en: {out_dir}")
+    print(f"Ejemplos: frame_000001.{image_format}, frame_000002.{image_format}, ...")
 
 
 if __name__ == "__main__":